@@ -1,8 +1,6 @@
 import asyncio
 import argparse
 from pathlib import Path
-import json
-from datetime import datetime
 import sys
 import os
 
@@ -14,39 +12,50 @@ from reporter.agents.feed_agent import process_feeds
 from reporter.services.discord import post_to_discord
 from reporter.services.discord_bot import run_discord_bot
 from reporter.utils.cache import get_latest_narrative
+from reporter.agents.poll_agent import FeedPoller
+from reporter.utils.run_store import create_run_file, find_run_file, find_unfinished_run
 
-def save_results(entries, narrative, output_dir: str) -> None:
-    """Save the results to JSON and text files in a timestamped folder."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_path = Path(output_dir)
-    output_path = base_path / timestamp
-    output_path.mkdir(parents=True, exist_ok=True)
-
-    # Save entries to JSON
-    entries_file = output_path / "entries.json"
-    with open(entries_file, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, indent=2, ensure_ascii=False)
-
-    # Save narrative to text file
+def save_results(narrative, output_path: Path, run_file: Path) -> None:
+    """Save the narrative next to the streamed entries file."""
     if narrative:
         narrative_file = output_path / "narrative.md"
         with open(narrative_file, 'w', encoding='utf-8') as f:
             f.write(narrative)
 
     print(f"\nResults saved to {output_path}")
-    print(f"- Entries: entries.json")
+    print(f"- Entries: {run_file.name}")
     if narrative:
         print(f"- Narrative: narrative.md")
 
-async def main_async(feed_list: str, output_dir: str, fetch_content: bool) -> None:
+async def main_async(feed_list: str, output_dir: str, fetch_content: bool,
+                     compress: bool, resume: bool, poll: bool) -> None:
     """Async main function that processes feeds and saves results."""
-    async def generate_content():
-        entries, narrative = await process_feeds(feed_list, fetch_full_content=fetch_content)
-        save_results(entries, narrative, output_dir)
-        return narrative
+    resume_dir = find_unfinished_run(output_dir) if resume else None
+    if resume:
+        print(f"Resuming run in {resume_dir}" if resume_dir else "No unfinished run to resume")
+    resume_file = find_run_file(resume_dir) if resume_dir else None
+
+    if poll:
+        poller = FeedPoller(feed_list, output_dir, fetch_content, compress, resume_file)
+
+        async def generate_content():
+            # Stories are already summarized by the poller, only the narrative is left
+            narrative, run_file = await poller.finish_run()
+            save_results(narrative, run_file.parent, run_file)
+            return narrative
+    else:
+        poller = None
+
+        async def generate_content():
+            nonlocal resume_file
+            # Only the first run after startup picks up the interrupted one
+            run_file, resume_file = resume_file or create_run_file(output_dir, compress), None
+            narrative = await process_feeds(feed_list, run_file, fetch_full_content=fetch_content)
+            save_results(narrative, run_file.parent, run_file)
+            return narrative
 
     print("\nStarting Discord bot...")
-    await run_discord_bot(generate_content, output_dir)
+    await run_discord_bot(generate_content, output_dir, poller)
 
 def main():
     parser = argparse.ArgumentParser(description='Process RSS feeds and generate summaries')
@@ -55,12 +64,19 @@ def main():
                        help='Output directory for results (default: output)')
     parser.add_argument('--no-content', action='store_true',
                        help='Skip fetching full article content')
+    parser.add_argument('--compress', action='store_true',
+                       help='Gzip the streamed entries file')
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume the most recent interrupted run on the first generation')
+    parser.add_argument('--poll', action='store_true',
+                       help='Poll feeds continuously and summarize new entries ahead of each post')
 
     args = parser.parse_args()
     print(f"Processing feeds from: {args.feed_list}")
     
     try:
-        asyncio.run(main_async(args.feed_list, args.output, not args.no_content))
+        asyncio.run(main_async(args.feed_list, args.output, not args.no_content,
+                               args.compress, args.resume, args.poll))
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
     except Exception as e:
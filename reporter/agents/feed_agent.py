@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator
 import asyncio
 import feedparser
 from datetime import datetime, timedelta
@@ -7,10 +7,15 @@ import concurrent.futures
 from tqdm import tqdm
 from functools import lru_cache
 import requests
+from pathlib import Path
 
 from reporter.utils.http import rate_limiter
+from reporter.config import OAI_COMPATIBLE_MAX_CONCURRENCY, CLUSTER_SIMILARITY_THRESHOLD, CLUSTER_MAX_CHARS
 from reporter.agents.content_agent import fetch_multiple_articles
-from reporter.services.oai_compatible import summarize_articles, generate_final_narrative
+from reporter.services.oai_compatible import summarize_cluster, generate_final_narrative
+from reporter.utils.run_store import RunState, RunWriter, iter_records, iter_grouped_contents, repair_run_file, story_key, entry_metadata
+from reporter.utils.cluster import Features, article_features, cluster_documents
+from reporter.utils.text import html_to_text
 
 @lru_cache(maxsize=100)
 def get_feed(url: str) -> str:
@@ -72,93 +77,199 @@ def is_article_recent(published: str, max_age_hours: int = 24) -> bool:
     age = datetime.now() - pub_date
     return age <= timedelta(hours=max_age_hours)
 
-async def process_feeds(filename: str, fetch_full_content: bool = True) -> Tuple[List[Dict], str]:
-    """Main function to process feeds and generate summaries."""
-    feed_list = load_feed_urls(filename)
-    all_entries = []
-    
-    # Fetch all feed entries concurrently
+def get_entry_id(entry: Dict) -> str:
+    """Stable ID for an entry, used to key its records in the run file."""
+    return entry['link'] or entry['title']
+
+def iter_recent_entries(feed_list: List[str]) -> Iterator[List[Dict]]:
+    """Fetch all feeds concurrently, yielding each feed's recent entries as it completes."""
     with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_url = {
-            executor.submit(fetch_and_parse_feed, url): url 
-            for url in feed_list
-        }
+        futures = [executor.submit(fetch_and_parse_feed, url) for url in feed_list]
         
         for future in tqdm(
-            concurrent.futures.as_completed(future_to_url),
+            concurrent.futures.as_completed(futures),
             total=len(feed_list),
             desc="Fetching feeds"
         ):
-            entries = future.result()
             # Filter out old articles
-            recent_entries = [
-                entry for entry in entries 
+            yield [
+                entry for entry in future.result()
                 if is_article_recent(entry['published'])
             ]
-            all_entries.extend(recent_entries)
-    
-    # Sort by published date
-    all_entries.sort(key=lambda x: x['published'], reverse=True)
-    
-    if not fetch_full_content:
-        return all_entries, ""
-
-    # Fetch full content for entries that need it
-    entries_needing_content = [
-        entry for entry in all_entries 
-        if not entry['content'] and entry['link']
-    ]
-    
-    if entries_needing_content:
-        print(f"\nFetching full content for {len(entries_needing_content)} articles...")
-        urls = [entry['link'] for entry in entries_needing_content]
-        
-        # Create progress bar for individual articles
-        with tqdm(total=len(urls), desc="Fetching articles") as pbar:
-            contents = []
-            batch_size = 1  # Process URLs in smaller batches
-            for i in range(0, len(urls), batch_size):
-                batch_urls = urls[i:i + batch_size]
-                batch_contents = await fetch_multiple_articles(batch_urls)
-                contents.extend(batch_contents)
-                pbar.update(len(batch_contents))
-        
-        # Filter out entries where content extraction failed
-        successful_entries = []
+
+def content_features(content: str) -> Features:
+    """Clustering features of an article's content."""
+    # Tags and attributes of feed-embedded HTML would make a feed's articles look alike
+    return article_features(html_to_text(content)[:CLUSTER_MAX_CHARS])
+
+class FeedRun:
+    """A run whose entries are streamed to run_file as they complete each stage.
+
+    Only entry metadata, compact clustering features and story summaries are kept in memory, so
+    entries can be added feed by feed and incrementally. If run_file already exists the run is
+    resumed from it.
+    """
+
+    def __init__(self, run_file: Path):
+        repair_run_file(run_file)
+        self.run_file = run_file
+        self.state = RunState.load(run_file)
+        self.features = {
+            record['id']: content_features(record['content'])
+            for record in iter_records(run_file)
+            if record['stage'] == 'content'
+        }
+        # Entries waiting for their content to be scraped, including those of a resumed run
+        self.pending = {
+            entry_id for entry_id in self.state.entries
+            if entry_id not in self.features and entry_id not in self.state.failed
+        }
+        self.clusters: List[List[str]] = []
+        self.writer = RunWriter(run_file)
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def __enter__(self) -> 'FeedRun':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_entries(self, entries: List[Dict], fetch_full_content: bool = True) -> int:
+        """Record a feed's entries, saving any content the feed carries.
+
+        Only entry metadata is kept in memory, entries without content are queued
+        for extraction. Returns the number of new entries.
+        """
+        new_count = 0
+        for entry in entries:
+            entry_id = get_entry_id(entry)
+            if entry_id not in self.state.entries:
+                record = {k: v for k, v in entry.items() if k not in ('id', 'content')}
+                self.writer.write('entry', entry_id, **record)
+                self.state.entries[entry_id] = entry_metadata(record)
+                new_count += 1
+
+            if entry_id in self.features or entry_id in self.state.failed:
+                continue
+            if entry['content']:
+                self.writer.write('content', entry_id, content=entry['content'])
+                self.features[entry_id] = content_features(entry['content'])
+                self.pending.discard(entry_id)
+            elif fetch_full_content:
+                self.pending.add(entry_id)
+        return new_count
+
+    async def extract_pending(self) -> None:
+        """Scrape the content of queued entries, most recent first."""
+        if not self.pending:
+            return
+
+        pending = sorted(self.pending, key=lambda entry_id: self.state.entries[entry_id]['published'], reverse=True)
         failed_count = 0
-        
-        # Keep entries that didn't need content
-        for entry in all_entries:
-            if entry not in entries_needing_content:
-                successful_entries.append(entry)
-        
-        # Process entries that needed content
-        for entry, content in zip(entries_needing_content, contents):
-            if content:
-                entry['content'] = content
-                successful_entries.append(entry)
-            else:
+        for entry_id in tqdm(pending, desc="Fetching articles"):
+            self.pending.discard(entry_id)
+            link = self.state.entries[entry_id]['link']
+            content = (await fetch_multiple_articles([link]))[0] if link else ""
+            if not content:
                 failed_count += 1
-                print(f"Failed to extract: {entry['link']}")
-        
-        all_entries = successful_entries
-        print(f"\nContent extraction complete: {len(successful_entries)} succeeded, {failed_count} failed")
+                print(f"Failed to extract: {link}")
+                self.writer.write('failed', entry_id)
+                self.state.failed.add(entry_id)
+                continue
 
-    # Generate summaries and final narrative
-    print("\nGenerating summaries...")
-    entries_with_content = [e for e in all_entries if e.get('content')]
-    
-    summaries = []
-    with tqdm(total=len(entries_with_content), desc="Summarizing articles") as pbar:
-        for content, url in [(e['content'], e['link']) for e in entries_with_content]:
-            summary = (await summarize_articles([(content, url)]))[0]
-            summaries.append(summary)
-            pbar.update(1)
-    
-    for entry, summary in zip(entries_with_content, summaries):
-        entry['summary'] = summary
+            self.writer.write('content', entry_id, content=content)
+            self.features[entry_id] = content_features(content)
 
-    print("\nGenerating final narrative...")
-    narrative = await generate_final_narrative([e['summary'] for e in entries_with_content])
-    
-    return all_entries, narrative
\ No newline at end of file
+        print(f"\nContent extraction complete: {len(pending) - failed_count} succeeded, {failed_count} failed")
+
+    async def summarize(self, final: bool = True) -> None:
+        """Cluster all articles into stories and summarize stories not yet summarized.
+
+        A story that gains an article needs summarizing again as a new story. Unless
+        final, only brand-new stories are summarized and grown ones wait for the
+        final pass, so each story costs at most two summaries however often it grows.
+        """
+        # Group articles covering the same story, keeping the feed order
+        ids = sorted(self.features, key=lambda entry_id: self.state.entries[entry_id]['published'], reverse=True)
+        # Clustering and scanning the run file run in threads so they don't block the event loop
+        members = await asyncio.to_thread(
+            cluster_documents, [self.features[entry_id] for entry_id in ids], CLUSTER_SIMILARITY_THRESHOLD
+        )
+        self.clusters = [[ids[i] for i in cluster] for cluster in members]
+        covered = {entry_id for key in self.state.stories for entry_id in key}
+        pending = [
+            c for c in self.clusters
+            if story_key(c) not in self.state.stories and (final or covered.isdisjoint(c))
+        ]
+        print(f"Grouped {len(ids)} articles into {len(self.clusters)} stories, {len(pending)} to summarize")
+        if not pending:
+            return
+
+        # Bounds both concurrent LLM calls and the article contents held in memory
+        semaphore = asyncio.Semaphore(OAI_COMPATIBLE_MAX_CONCURRENCY)
+        tasks = []
+
+        with tqdm(total=len(pending), desc="Summarizing stories") as pbar:
+            async def summarize_story(cluster: List[str], contents: Dict[str, str]) -> None:
+                try:
+                    summary = await summarize_cluster([
+                        (contents[entry_id], self.state.entries[entry_id]['link']) for entry_id in cluster
+                    ])
+                    # Failed stories get no record so they are retried on the next pass
+                    if summary is not None:
+                        self.state.stories[story_key(cluster)] = summary
+                        self.writer.write('summary', cluster[0], summary=summary, sources=cluster)
+                finally:
+                    semaphore.release()
+                    pbar.update(1)
+
+            stories = iter_grouped_contents(self.run_file, pending)
+            while (story := await asyncio.to_thread(next, stories, None)) is not None:
+                cluster, contents = story
+                if not cluster:
+                    pbar.update(1)
+                    continue
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(summarize_story(cluster, contents)))
+
+            await asyncio.gather(*tasks)
+
+        if final:
+            # Summaries of stories that have since grown are no longer needed
+            current = {story_key(c) for c in self.clusters}
+            self.state.stories = {k: v for k, v in self.state.stories.items() if k in current}
+
+    async def generate_narrative(self) -> str:
+        """Generate the final narrative from the current story summaries."""
+        print("\nGenerating final narrative...")
+        summaries = [
+            self.state.stories[story_key(cluster)] for cluster in self.clusters
+            if story_key(cluster) in self.state.stories
+        ]
+        return await generate_final_narrative(summaries)
+
+async def process_feeds(filename: str, run_file: Path, fetch_full_content: bool = True) -> str:
+    """Main function to process feeds and generate summaries.
+
+    Articles are clustered into stories and each story is summarized once. If
+    run_file already exists the run is resumed.
+    """
+    feed_list = load_feed_urls(filename)
+
+    with FeedRun(run_file) as run:
+        if run.state.entries:
+            print(f"Resuming run with {len(run.state.entries)} entries")
+
+        # Each feed is recorded as soon as it is fetched, so parsed entries are not kept around
+        for entries in iter_recent_entries(feed_list):
+            run.add_entries(entries, fetch_full_content)
+        if not fetch_full_content:
+            return ""
+
+        await run.extract_pending()
+
+        print("\nGenerating summaries...")
+        await run.summarize()
+        return await run.generate_narrative()
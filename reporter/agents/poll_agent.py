@@ -0,0 +1,170 @@
+from typing import List, Dict, Optional, Set, Tuple
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+import asyncio
+import re
+import time
+import requests
+
+from reporter.config import MIN_POLL_INTERVAL, MAX_POLL_INTERVAL, DEFAULT_POLL_INTERVAL, POLL_BACKOFF
+from reporter.agents.feed_agent import FeedRun, get_entry_id, is_article_recent, load_feed_urls, parse_feed
+from reporter.utils.run_store import create_run_file, find_latest_finished_run, load_entry_ids
+
+def parse_cache_lifetime(headers) -> float:
+    """Seconds the response may be cached for according to its HTTP headers."""
+    match = re.search(r'max-age=(\d+)', headers.get('Cache-Control', ''))
+    if match:
+        return float(match.group(1))
+
+    try:
+        expires = parsedate_to_datetime(headers['Expires'])
+        return max(expires.timestamp() - time.time(), 0.0)
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+def parse_feed_schedule(xml_data: str) -> Tuple[float, Set[int]]:
+    """Extract the RSS ttl (in seconds) and skipHours (GMT) from a feed."""
+    ttl = re.search(r'<ttl>\s*(\d+)\s*</ttl>', xml_data)
+    skip_hours = re.search(r'<skipHours>(.*?)</skipHours>', xml_data, re.DOTALL)
+    hours = re.findall(r'<hour>\s*(\d+)\s*</hour>', skip_hours.group(1)) if skip_hours else []
+    return (float(ttl.group(1)) * 60 if ttl else 0.0), {int(h) % 24 for h in hours}
+
+class FeedSchedule:
+    """Polling state for a single feed."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.interval = DEFAULT_POLL_INTERVAL
+        self.next_poll = 0.0
+        self.etag: Optional[str] = None
+        self.modified: Optional[str] = None
+        self.min_interval = 0.0
+        self.skip_hours: Set[int] = set()
+        self.last_new_at: Optional[float] = None
+        self.update_gap: Optional[float] = None
+
+    def is_due(self, now: float) -> bool:
+        return now >= self.next_poll
+
+    def fetch(self) -> Optional[str]:
+        """Fetch the feed with a conditional GET. Returns None if unchanged."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+
+        response = requests.get(self.url, headers=headers, timeout=10)
+        cache_lifetime = parse_cache_lifetime(response.headers)
+        if response.status_code == 304:
+            self.min_interval = max(self.min_interval, cache_lifetime)
+            return None
+        response.raise_for_status()
+
+        self.etag = response.headers.get('ETag')
+        self.modified = response.headers.get('Last-Modified')
+        ttl, self.skip_hours = parse_feed_schedule(response.text)
+        self.min_interval = max(ttl, cache_lifetime)
+        return response.text
+
+    def record_poll(self, new_count: int, now: float) -> None:
+        """Adapt the polling interval to how often the feed publishes new entries."""
+        if new_count:
+            if self.last_new_at is not None:
+                gap = now - self.last_new_at
+                self.update_gap = gap if self.update_gap is None else (self.update_gap + gap) / 2
+            self.last_new_at = now
+            # Poll twice per observed update gap, or speed up until one is observed
+            self.interval = self.update_gap / 2 if self.update_gap else self.interval / 2
+        else:
+            self.interval *= POLL_BACKOFF
+
+        self.interval = min(max(self.interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+        # The feed's ttl and cache headers are honoured up to the maximum interval
+        interval = max(self.interval, min(self.min_interval, MAX_POLL_INTERVAL))
+
+        next_poll = now + interval
+        for _ in range(24):
+            if time.gmtime(next_poll).tm_hour not in self.skip_hours:
+                break
+            next_poll = (next_poll // 3600 + 1) * 3600
+        self.next_poll = next_poll
+
+class FeedPoller:
+    """Polls each feed on its own interval and ingests new entries into the current run.
+
+    New stories are summarized as entries arrive, so finishing a run only needs to
+    re-summarize stories that grew since, and the narrative step. Each run covers the entries first seen since the previous one.
+    """
+
+    def __init__(self, filename: str, output_dir: str, fetch_full_content: bool = True,
+                 compress: bool = False, run_file: Optional[Path] = None):
+        self.schedules = [FeedSchedule(url) for url in load_feed_urls(filename)]
+        self.output_dir = output_dir
+        self.fetch_full_content = fetch_full_content
+        self.compress = compress
+        self.lock = asyncio.Lock()
+        self.run = FeedRun(run_file or create_run_file(output_dir, compress))
+        # Entries covered by the previous run. Older ones have aged out of the 24h window.
+        # After a restart the previous run is the newest one with a narrative on disk
+        previous_run = find_latest_finished_run(output_dir)
+        self.previous_ids: Set[str] = load_entry_ids(previous_run) if previous_run else set()
+
+    async def poll_feed(self, schedule: FeedSchedule) -> Tuple[FeedSchedule, List[Dict]]:
+        """Poll a single feed and return its recent entries, if it changed."""
+        try:
+            xml_data = await asyncio.to_thread(schedule.fetch)
+        except requests.RequestException as e:
+            print(f"Error polling feed {schedule.url}: {e}")
+            return schedule, []
+        if not xml_data:
+            return schedule, []
+        return schedule, [entry for entry in parse_feed(xml_data) if is_article_recent(entry['published'])]
+
+    async def poll_once(self) -> None:
+        """Poll every due feed, then extract and summarize what is new."""
+        now = time.time()
+        due = [s for s in self.schedules if s.is_due(now)]
+        if not due:
+            return
+
+        new_count = 0
+        # Each feed is recorded as soon as it is polled, so parsed entries are not kept around
+        for poll in asyncio.as_completed([self.poll_feed(s) for s in due]):
+            schedule, entries = await poll
+            entries = [e for e in entries if get_entry_id(e) not in self.previous_ids]
+            async with self.lock:
+                feed_new_count = self.run.add_entries(entries, self.fetch_full_content)
+            schedule.record_poll(feed_new_count, now)
+            new_count += feed_new_count
+
+        # Entries queued by a resumed run are extracted even when nothing new arrived
+        if self.fetch_full_content and (new_count or self.run.pending):
+            async with self.lock:
+                await self.run.extract_pending()
+                await self.run.summarize(final=False)
+
+    async def _generate_narrative(self) -> str:
+        if not self.fetch_full_content:
+            return ""
+        await self.run.extract_pending()
+        await self.run.summarize()
+        return await self.run.generate_narrative()
+
+    async def generate_narrative(self) -> str:
+        """Generate a narrative for the current run so far, without finishing it."""
+        async with self.lock:
+            return await self._generate_narrative()
+
+    async def finish_run(self) -> Tuple[str, Path]:
+        """Generate the narrative for the current run and start a new one.
+
+        Returns the narrative and the run file of the finished run.
+        """
+        async with self.lock:
+            run = self.run
+            narrative = await self._generate_narrative()
+            run.close()
+            self.previous_ids = set(run.state.entries)
+            self.run = FeedRun(create_run_file(self.output_dir, self.compress))
+            return narrative, run.run_file
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,6 +9,16 @@ OAI_COMPATIBLE_API_KEY = os.getenv('OAI_COMPATIBLE_API_KEY')
 OAI_COMPATIBLE_MODEL = os.getenv('OAI_COMPATIBLE_MODEL', 'gpt-4o-mini')
 OAI_COMPATIBLE_API_BASE = os.getenv('OAI_COMPATIBLE_API_BASE', 'https://api.openai.com/v1')
 
+# Endpoint pool: JSON list of {"api_base", "api_key", "model", "weight"} objects.
+# Missing fields fall back to the single-endpoint settings above.
+OAI_COMPATIBLE_ENDPOINTS = json.loads(os.getenv('OAI_COMPATIBLE_ENDPOINTS', '[]'))
+OAI_COMPATIBLE_MAX_CONCURRENCY = int(os.getenv('OAI_COMPATIBLE_MAX_CONCURRENCY', '4'))
+OAI_COMPATIBLE_HEDGE_PERCENTILE = float(os.getenv('OAI_COMPATIBLE_HEDGE_PERCENTILE', '0'))  # 0 disables hedging
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+ENDPOINT_BACKOFF_BASE = 5  # seconds
+ENDPOINT_BACKOFF_MAX = 300  # seconds
+
 # HTTP Configuration
 MAX_CONNECTIONS = 30
 MAX_RETRIES = 3
@@ -18,6 +29,18 @@ RANDOM_DELAY_RANGE = (1, 2)  # seconds
 MIN_WORD_COUNT = 50
 MIN_TEXT_BLOCK_SIZE = 100
 
+# Story Clustering
+CLUSTER_SIMILARITY_THRESHOLD = float(os.getenv('CLUSTER_SIMILARITY_THRESHOLD', '0.35'))  # > 1 disables clustering
+CLUSTER_TERMS_PER_ARTICLE = 256
+CLUSTER_MAX_CHARS = 8000  # Characters of each article used for clustering
+
+# Feed Polling
+MIN_POLL_INTERVAL = 5 * 60  # seconds
+MAX_POLL_INTERVAL = 3 * 60 * 60  # seconds
+DEFAULT_POLL_INTERVAL = 30 * 60  # seconds
+POLL_BACKOFF = 1.5  # Interval growth after a poll with no new entries
+POLL_CHECK_INTERVAL = 60  # seconds between checks for feeds that are due
+
 # Type definitions
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
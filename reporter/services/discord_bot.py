@@ -2,20 +2,26 @@ import discord
 from discord.ext import commands, tasks
 from datetime import datetime, time
 import asyncio
-from reporter.config import DISCORD_BOT_TOKEN, DISCORD_CHANNEL_IDS, DISCORD_MESSAGE_LIMIT, DISCORD_BOT_ID
-from typing import Callable, Awaitable
+from reporter.config import DISCORD_BOT_TOKEN, DISCORD_CHANNEL_IDS, DISCORD_MESSAGE_LIMIT, DISCORD_BOT_ID, POLL_CHECK_INTERVAL
+from typing import Callable, Awaitable, Optional
 from reporter.utils.cache import get_latest_narrative
+from reporter.agents.poll_agent import FeedPoller
 
 class ReporterBot(commands.Bot):
-    def __init__(self, content_generator: Callable[[], Awaitable[str]], output_dir: str):
+    def __init__(self, content_generator: Callable[[], Awaitable[str]], output_dir: str,
+                 poller: Optional[FeedPoller] = None):
         intents = discord.Intents.default()
         intents.message_content = True
         super().__init__(command_prefix='!', intents=intents)
         self.content_generator = content_generator
         self.output_dir = output_dir
+        self.poller = poller
 
     async def setup_hook(self) -> None:
         self.scheduled_post.start()
+        if self.poller:
+            self.poll_feeds.start()
+            print("Background feed polling is active")
         print("Bot is ready and scheduled posting is active")
 
     async def post_content(self, content: str, channel=None) -> None:
@@ -45,6 +51,14 @@ class ReporterBot(commands.Bot):
         except Exception as e:
             print(f"Error in scheduled post: {type(e).__name__}: {str(e)}")
 
+    @tasks.loop(seconds=POLL_CHECK_INTERVAL)
+    async def poll_feeds(self):
+        """Poll feeds that are due and summarize new entries ahead of the next post."""
+        try:
+            await self.poller.poll_once()
+        except Exception as e:
+            print(f"Error polling feeds: {type(e).__name__}: {str(e)}")
+
     async def on_message(self, message: discord.Message):
         """Handle bot mentions using cached content when available."""
         if message.author.id == self.user.id:
@@ -57,7 +71,11 @@ class ReporterBot(commands.Bot):
                     content = get_latest_narrative(self.output_dir)
                     if not content:
                         print("No cached content available, generating fresh content...")
-                        content = await self.content_generator()
+                        if self.poller:
+                            # Only the scheduled post finishes the poller's run
+                            content = await self.poller.generate_narrative()
+                        else:
+                            content = await self.content_generator()
                     
                     if content:
                         await self.post_content(content, message.channel)
@@ -99,11 +117,12 @@ class ReporterBot(commands.Bot):
             
         return embeds
 
-async def run_discord_bot(content_generator: Callable[[], Awaitable[str]], output_dir: str) -> None:
-    """Run the Discord bot."""
+async def run_discord_bot(content_generator: Callable[[], Awaitable[str]], output_dir: str,
+                          poller: Optional[FeedPoller] = None) -> None:
+    """Run the Discord bot, optionally polling feeds in the background."""
     if not DISCORD_BOT_TOKEN or not DISCORD_CHANNEL_IDS:
         raise ValueError("DISCORD_BOT_TOKEN or DISCORD_CHANNEL_IDS not set")
 
-    bot = ReporterBot(content_generator, output_dir)
+    bot = ReporterBot(content_generator, output_dir, poller)
     async with bot:
         await bot.start(DISCORD_BOT_TOKEN)
\ No newline at end of file
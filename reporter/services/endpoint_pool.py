@@ -0,0 +1,154 @@
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+from collections import defaultdict, deque
+from typing import List, Dict, Hashable, Optional
+import asyncio
+import random
+import time
+from reporter.config import (
+    OAI_COMPATIBLE_API_KEY, OAI_COMPATIBLE_MODEL, OAI_COMPATIBLE_API_BASE,
+    OAI_COMPATIBLE_ENDPOINTS, OAI_COMPATIBLE_HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+    LATENCY_WINDOW, ENDPOINT_BACKOFF_BASE, ENDPOINT_BACKOFF_MAX
+)
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Whether an error reflects the endpoint's health rather than a bad request."""
+    if isinstance(error, (APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+class Endpoint:
+    def __init__(self, api_base: str, api_key: str, model: str, weight: float = 1.0):
+        self.api_base = api_base
+        self.model = model
+        self.weight = weight
+        self.client = AsyncOpenAI(api_key=api_key, base_url=api_base)
+        self.outstanding = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        # Recent latencies per request class, so long requests are not judged against short ones
+        self.latencies: Dict[Hashable, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def mark_success(self) -> None:
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def mark_failure(self) -> None:
+        """Take the endpoint out of rotation with exponential backoff."""
+        self.failures += 1
+        backoff = min(ENDPOINT_BACKOFF_BASE * 2 ** (self.failures - 1), ENDPOINT_BACKOFF_MAX)
+        self.unhealthy_until = time.monotonic() + backoff
+
+class EndpointPool:
+    def __init__(self, endpoints: List[Endpoint], hedge_percentile: float = 0.0):
+        self.endpoints = endpoints
+        self.hedge_percentile = hedge_percentile
+
+    def pick(self, exclude: List[Endpoint]) -> Optional[Endpoint]:
+        """Pick the untried endpoint with the fewest outstanding requests per unit of weight."""
+        candidates = [e for e in self.endpoints if e not in exclude]
+        healthy = [e for e in candidates if e.is_healthy()]
+        # Unhealthy endpoints are only used as a last resort
+        candidates = healthy or candidates
+        if not candidates:
+            return None
+        return min(candidates, key=lambda e: ((e.outstanding + 1) / e.weight, random.random()))
+
+    def hedge_delay(self, endpoint: Endpoint, request_class: Hashable) -> Optional[float]:
+        """Latency after which a second attempt is fired, or None if hedging is off."""
+        latencies = endpoint.latencies.get(request_class, ())
+        if not self.hedge_percentile or len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        return ordered[int(self.hedge_percentile * (len(ordered) - 1))]
+
+    async def _attempt(self, endpoint: Endpoint, messages: List[Dict], **kwargs) -> str:
+        endpoint.outstanding += 1
+        start = time.monotonic()
+        try:
+            response = await endpoint.client.chat.completions.create(
+                model=endpoint.model,
+                messages=messages,
+                **kwargs
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Client errors such as an oversized prompt say nothing about the endpoint
+            if is_endpoint_failure(e):
+                endpoint.mark_failure()
+            print(f"Endpoint {endpoint.api_base} failed: {type(e).__name__}: {str(e)}")
+            raise
+        finally:
+            endpoint.outstanding -= 1
+
+        endpoint.mark_success()
+        endpoint.latencies[kwargs.get('max_tokens')].append(time.monotonic() - start)
+        return response.choices[0].message.content.strip()
+
+    async def complete(self, messages: List[Dict], **kwargs) -> str:
+        """Run a chat completion with failover and optional hedging across endpoints."""
+        if not self.endpoints:
+            raise ValueError("No OpenAI-compatible endpoints configured")
+
+        tried = []
+        pending = set()
+        hedged = False
+        # Requests are only hedged against latencies of the same size of request
+        request_class = kwargs.get('max_tokens')
+        last_error = None
+
+        def launch() -> bool:
+            endpoint = self.pick(tried)
+            if endpoint is None:
+                return False
+            tried.append(endpoint)
+            pending.add(asyncio.create_task(self._attempt(endpoint, messages, **kwargs)))
+            return True
+
+        try:
+            while pending or launch():
+                timeout = None if hedged else self.hedge_delay(tried[-1], request_class)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is slower than the hedge percentile, race a second endpoint
+                    hedged = True
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+def build_pool() -> EndpointPool:
+    """Build the endpoint pool from configuration."""
+    configs = OAI_COMPATIBLE_ENDPOINTS
+    if not configs and OAI_COMPATIBLE_API_KEY:
+        configs = [{}]
+
+    for config in configs:
+        if float(config.get('weight', 1.0)) <= 0:
+            raise ValueError(f"Endpoint weight must be positive: {config}")
+
+    endpoints = [
+        Endpoint(
+            api_base=config.get('api_base', OAI_COMPATIBLE_API_BASE),
+            api_key=config.get('api_key', OAI_COMPATIBLE_API_KEY),
+            model=config.get('model', OAI_COMPATIBLE_MODEL),
+            weight=float(config.get('weight', 1.0))
+        )
+        for config in configs
+    ]
+    return EndpointPool(endpoints, hedge_percentile=OAI_COMPATIBLE_HEDGE_PERCENTILE)
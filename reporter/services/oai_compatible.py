@@ -1,7 +1,6 @@
-from openai import AsyncOpenAI
-from typing import List
+from typing import List, Optional
 import os
-from reporter.config import OAI_COMPATIBLE_API_KEY, OAI_COMPATIBLE_MODEL, OAI_COMPATIBLE_API_BASE
+from reporter.services.endpoint_pool import build_pool
 
 def load_prompt(filename: str) -> str:
     """Load prompt from a file."""
@@ -10,20 +9,14 @@ def load_prompt(filename: str) -> str:
         return f.read().strip()
 
 SUMMARIZE_ARTICLES_PROMPT = load_prompt('summarize_articles_prompt.txt')
+SUMMARIZE_CLUSTER_PROMPT = load_prompt('summarize_cluster_prompt.txt')
 GENERATE_NARRATIVE_PROMPT = load_prompt('generate_narrative_prompt.txt')
 
-client = AsyncOpenAI(
-    api_key=OAI_COMPATIBLE_API_KEY,
-    base_url=OAI_COMPATIBLE_API_BASE
-)
+pool = build_pool()
 
 async def summarize_single_article(content: str, url: str) -> str:
     """Summarize a single article using the OpenAI API."""
-    if not OAI_COMPATIBLE_API_KEY:
-        raise ValueError("OAI_COMPATIBLE_API_KEY not set")
-
-    response = await client.chat.completions.create(
-        model=OAI_COMPATIBLE_MODEL,
+    return await pool.complete(
         messages=[{
             "role": "user",
             "content": f"{SUMMARIZE_ARTICLES_PROMPT}\n\nArticle:\nURL: {url}\n{content[:4000]}"
@@ -31,34 +24,42 @@ async def summarize_single_article(content: str, url: str) -> str:
         max_tokens=500,
         temperature=0.7
     )
-    
-    return response.choices[0].message.content.strip()
 
-async def summarize_articles(contents: List[tuple[str, str]]) -> List[str]:
-    """Summarize multiple articles individually using the OpenAI API."""
-    summaries = []
-    
-    for content, url in contents:
-        try:
-            summary = await summarize_single_article(content, url)
-            summaries.append(summary)
-        except Exception as e:
-            print(f"Error summarizing article {url}: {e}")
-            summaries.append("Failed to generate summary")
-            
-    return summaries
+async def summarize_multiple_articles(contents: List[tuple[str, str]]) -> str:
+    """Summarize several articles covering the same story in one request."""
+    max_chars_per_article = max(8000 // len(contents), 1000)
+    formatted_articles = "\n\n---\n\n".join(
+        f"URL: {url}\n{content[:max_chars_per_article]}" for content, url in contents
+    )
+    return await pool.complete(
+        messages=[{
+            "role": "user",
+            "content": f"{SUMMARIZE_CLUSTER_PROMPT}\n\nArticles:\n{formatted_articles}"
+        }],
+        max_tokens=700,
+        temperature=0.7
+    )
+
+async def summarize_cluster(contents: List[tuple[str, str]]) -> Optional[str]:
+    """Summarize a cluster of articles covering the same story.
+
+    Returns None if the summary could not be generated, so it can be retried.
+    """
+    try:
+        if len(contents) == 1:
+            return await summarize_single_article(*contents[0])
+        return await summarize_multiple_articles(contents)
+    except Exception as e:
+        print(f"Error summarizing story from {contents[0][1]} ({len(contents)} articles): {e}")
+        return None
 
 async def generate_final_narrative(summaries: List[str]) -> str:
     """Generate a final narrative from all the summaries."""
-    if not OAI_COMPATIBLE_API_KEY:
-        raise ValueError("OAI_COMPATIBLE_API_KEY not set")
-    
     max_chars_per_summary = 2000
     truncated_summaries = [s[:max_chars_per_summary] for s in summaries]
     formatted_summaries = "\n\n---\n\n".join(truncated_summaries)
     
-    response = await client.chat.completions.create(
-        model=OAI_COMPATIBLE_MODEL,
+    return await pool.complete(
         messages=[{
             "role": "user",
             "content": f"{GENERATE_NARRATIVE_PROMPT}\n\n{formatted_summaries}"
@@ -66,5 +67,3 @@ async def generate_final_narrative(summaries: List[str]) -> str:
         max_tokens=4000,
         temperature=0.7
     )
-    
-    return response.choices[0].message.content.strip()
@@ -8,25 +8,19 @@ def get_latest_narrative(output_dir: str, max_age_hours: float = 23.98) -> str:
     if not base_path.exists():
         return None
 
-    # Get all timestamped directories
-    dirs = [d for d in base_path.iterdir() if d.is_dir()]
+    # Get all timestamped directories, skipping runs still in progress
+    dirs = [d for d in base_path.iterdir() if d.is_dir() and (d / "narrative.md").exists()]
     if not dirs:
         return None
 
     # Sort by directory name (timestamp format)
     latest_dir = sorted(dirs)[-1]
     
-    # Check if within age limit
-    try:
-        dir_time = datetime.strptime(latest_dir.name, "%Y%m%d_%H%M%S")
-        if datetime.now() - dir_time > timedelta(hours=max_age_hours):
-            return None
-    except ValueError:
-        return None
-
-    # Read the narrative file
+    # Check if within age limit. Age is taken from when the narrative was saved, as a
+    # polled run's directory is named when the run started, up to a day earlier
     narrative_file = latest_dir / "narrative.md"
-    if not narrative_file.exists():
+    saved_time = datetime.fromtimestamp(narrative_file.stat().st_mtime)
+    if datetime.now() - saved_time > timedelta(hours=max_age_hours):
         return None
 
     return narrative_file.read_text(encoding='utf-8')
@@ -0,0 +1,79 @@
+from collections import Counter
+from typing import List, Tuple
+import zlib
+import numpy as np
+from reporter.config import CLUSTER_TERMS_PER_ARTICLE
+from reporter.utils.text import tokenize
+
+# Hashed term ids and their counts, a few KB per article instead of a dict of strings
+Features = Tuple[np.ndarray, np.ndarray]
+
+def article_features(text: str) -> Features:
+    """Compact clustering features: hashed ids and counts of the article's most frequent terms."""
+    counts = Counter(tokenize(text)).most_common(CLUSTER_TERMS_PER_ARTICLE)
+    ids = np.array([zlib.crc32(term.encode('utf-8')) for term, _ in counts], dtype=np.uint32)
+    tf = np.array([count for _, count in counts], dtype=np.float32)
+    return ids, tf
+
+def similarity_matrix(features: List[Features]) -> np.ndarray:
+    """Cosine similarity of L2-normalised TF-IDF vectors, built from sparse features."""
+    n = len(features)
+    docs = np.concatenate([np.full(len(ids), i, dtype=np.int32) for i, (ids, _) in enumerate(features)])
+    ids = np.concatenate([ids for ids, _ in features])
+    tf = np.concatenate([tf for _, tf in features])
+
+    _, term_index, doc_freq = np.unique(ids, return_inverse=True, return_counts=True)
+    df = doc_freq[term_index]
+    weights = (1 + np.log(tf)) * (np.log((1 + n) / (1 + df)) + 1)
+
+    # Norms cover every term, so words unique to an article still count against
+    # the few generic words it shares with others
+    norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n))
+    norms[norms == 0] = 1
+    weights = (weights / norms[docs]).astype(np.float32)
+
+    # Only terms shared by several articles contribute to the dot products
+    shared = df > 1
+    order = np.argsort(term_index[shared], kind='stable')
+    terms, docs, weights = term_index[shared][order], docs[shared][order], weights[shared][order]
+
+    similarity = np.zeros((n, n), dtype=np.float32)
+    bounds = np.flatnonzero(np.diff(terms)) + 1
+    for term_docs, term_weights in zip(np.split(docs, bounds), np.split(weights, bounds)):
+        similarity[np.ix_(term_docs, term_docs)] += np.outer(term_weights, term_weights)
+    return similarity
+
+def cluster_documents(features: List[Features], threshold: float) -> List[List[int]]:
+    """Group documents by average-linkage agglomerative clustering on cosine similarity.
+
+    Clusters are merged while their average similarity is at least threshold and
+    positive. Each cluster lists document indices in input order, and clusters are
+    ordered by their first document.
+    """
+    n = len(features)
+    if n < 2 or threshold > 1:
+        return [[i] for i in range(n)]
+
+    similarity = similarity_matrix(features)
+    np.fill_diagonal(similarity, -np.inf)
+
+    clusters = {i: [i] for i in range(n)}
+    while len(clusters) > 1:
+        a, b = np.unravel_index(np.argmax(similarity), similarity.shape)
+        # Articles sharing no terms are never merged, even with a non-positive threshold
+        if similarity[a, b] < threshold or similarity[a, b] <= 0:
+            break
+        a, b = min(a, b), max(a, b)
+
+        # Lance-Williams update for average linkage
+        size_a, size_b = len(clusters[a]), len(clusters[b])
+        merged = (size_a * similarity[a] + size_b * similarity[b]) / (size_a + size_b)
+        similarity[a, :] = merged
+        similarity[:, a] = merged
+        similarity[a, a] = -np.inf
+        similarity[b, :] = -np.inf
+        similarity[:, b] = -np.inf
+
+        clusters[a].extend(clusters.pop(b))
+
+    return sorted((sorted(members) for members in clusters.values()), key=lambda c: c[0])
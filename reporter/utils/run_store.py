@@ -0,0 +1,158 @@
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import gzip
+import json
+import zlib
+from datetime import datetime
+
+RUN_FILE = "entries.jsonl"
+COMPRESSED_RUN_FILE = "entries.jsonl.gz"
+# Entry fields kept in memory; the full entry only lives in the run file
+ENTRY_METADATA = ('title', 'link', 'published')
+
+def open_run_file(path: Path, mode: str):
+    """Open a run file as text, transparently handling gzip."""
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def create_run_file(output_dir: str, compress: bool = False) -> Path:
+    """Create a timestamped folder for a new run and return its run file path."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = Path(output_dir) / timestamp
+    output_path.mkdir(parents=True, exist_ok=True)
+    return output_path / (COMPRESSED_RUN_FILE if compress else RUN_FILE)
+
+def find_run_file(run_dir: Path) -> Optional[Path]:
+    """Find the run file in a run directory, if any."""
+    for name in (RUN_FILE, COMPRESSED_RUN_FILE):
+        path = run_dir / name
+        if path.exists():
+            return path
+    return None
+
+def find_unfinished_run(output_dir: str) -> Optional[Path]:
+    """Get the most recent run directory that has a run file but no narrative."""
+    base_path = Path(output_dir)
+    if not base_path.exists():
+        return None
+
+    for run_dir in sorted((d for d in base_path.iterdir() if d.is_dir()), reverse=True):
+        if (run_dir / "narrative.md").exists():
+            return None
+        if find_run_file(run_dir):
+            return run_dir
+    return None
+
+def find_latest_finished_run(output_dir: str) -> Optional[Path]:
+    """Get the run file of the most recent run that produced a narrative."""
+    base_path = Path(output_dir)
+    if not base_path.exists():
+        return None
+
+    for run_dir in sorted((d for d in base_path.iterdir() if d.is_dir()), reverse=True):
+        if (run_dir / "narrative.md").exists():
+            return find_run_file(run_dir)
+    return None
+
+def iter_records(path: Path) -> Iterator[Dict]:
+    """Iterate over the records of a run file, stopping at a truncated tail."""
+    if not path.exists():
+        return
+    try:
+        with open_run_file(path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial line from an interrupted write
+                    return
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        # Truncated gzip stream from an interrupted write
+        return
+
+def repair_run_file(path: Path) -> None:
+    """Rewrite a run file without its truncated tail so it can be appended to again."""
+    if not path.exists():
+        return
+    tmp_path = path.with_name('repair_' + path.name)
+    with open_run_file(tmp_path, 'w') as f:
+        for record in iter_records(path):
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    tmp_path.replace(path)
+
+class RunWriter:
+    """Append-only JSONL writer that flushes every record so a crash loses at most one."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open_run_file(path, 'a')
+
+    def write(self, stage: str, entry_id: str, **fields) -> None:
+        record = {'stage': stage, 'id': entry_id, **fields}
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'RunWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def entry_metadata(entry: Dict) -> Dict:
+    """The subset of an entry kept in memory during a run."""
+    return {k: entry.get(k, '') for k in ENTRY_METADATA}
+
+def story_key(sources: List[str]) -> Tuple[str, ...]:
+    """Key identifying a story by its set of articles."""
+    return tuple(sorted(sources))
+
+class RunState:
+    """Progress of a run, rebuilt from its run file without holding article content."""
+
+    def __init__(self):
+        self.entries: Dict[str, Dict] = {}
+        self.stories: Dict[Tuple[str, ...], str] = {}
+        self.failed: Set[str] = set()
+
+    @classmethod
+    def load(cls, path: Path) -> 'RunState':
+        state = cls()
+        for record in iter_records(path):
+            stage = record.pop('stage')
+            entry_id = record['id']
+            if stage == 'entry':
+                state.entries[entry_id] = entry_metadata(record)
+            elif stage == 'summary':
+                # Story summaries are keyed by their first article and list every source
+                state.stories[story_key(record.get('sources', [entry_id]))] = record['summary']
+            elif stage == 'failed':
+                state.failed.add(entry_id)
+        return state
+
+def load_entry_ids(path: Path) -> Set[str]:
+    """IDs of every entry recorded in a run file."""
+    return {record['id'] for record in iter_records(path) if record['stage'] == 'entry'}
+
+def iter_grouped_contents(path: Path, groups: List[List[str]]) -> Iterator[Tuple[List[str], Dict[str, str]]]:
+    """Yield each group of entry IDs with their saved contents as soon as all are read.
+
+    Only contents of incomplete groups are held while scanning the run file.
+    """
+    group_of = {entry_id: i for i, group in enumerate(groups) for entry_id in group}
+    collected: Dict[int, Dict[str, str]] = {}
+    for record in iter_records(path):
+        if record['stage'] != 'content' or record['id'] not in group_of:
+            continue
+        i = group_of.pop(record['id'])
+        contents = collected.setdefault(i, {})
+        contents[record['id']] = record['content']
+        if len(contents) == len(groups[i]):
+            yield groups[i], collected.pop(i)
+
+    # Groups with contents missing from a truncated file
+    for i, contents in collected.items():
+        yield [entry_id for entry_id in groups[i] if entry_id in contents], contents
@@ -1,6 +1,7 @@
 
 import re
 from typing import List
+from bs4 import BeautifulSoup
 
 NOISE_PATTERNS = [
     r'JavaScript must be enabled',
@@ -33,4 +34,25 @@ def clean_text(text: str) -> str:
         ):
             cleaned_paragraphs.append(p.strip())
     
-    return '\n\n'.join(p for p in cleaned_paragraphs if p)
\ No newline at end of file
+    return '\n\n'.join(p for p in cleaned_paragraphs if p)
+
+STOPWORDS = frozenset("""
+a about after again all also an and any are as at be because been before being but by can could
+did do does for from had has have he her here his how i if in into is it its just more most new
+no not of on one only or other our out over said says she so some than that the their them then
+there these they this those through to two up was we were what when where which while who will
+with would year years you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, dropping stopwords and short words."""
+    return [
+        word for word in re.findall(r"[a-z][a-z0-9']+", text.lower())
+        if len(word) > 2 and word not in STOPWORDS
+    ]
+
+def html_to_text(content: str) -> str:
+    """Strip markup, such as feed-embedded content:encoded HTML, from content."""
+    if '<' not in content:
+        return content
+    return BeautifulSoup(content, 'lxml').get_text(separator=' ')